@@ -10,6 +10,7 @@ import chatgpt
 import gcal
 import json
 import logging
+import loop_watchdog
 import re
 import voice
 
@@ -67,6 +68,7 @@ async def handle_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     Use /calendar to view your calendar events for today
 
     Use `/dev forget` to reset the chatgpt history
+    Use `/dev profile [on|off|show]` to sample what is blocking the event loop
     """)
 
 async def handle_unknown(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -87,6 +89,8 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def handle_dev(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if context.args[0] == "forget":
         await chatgpt.handle_forget(update, context)
+    elif context.args[0] == "profile":
+        await loop_watchdog.handle_profile(update, context)
     else:
         await update.message.reply_text("Unknown dev command")
 
@@ -101,13 +105,16 @@ async def generate_image(context, chat_id, send_fn, function_args):
     encoded_url = quote(url, safe='')
     return encoded_url
 
+async def post_init(application: Application) -> None:
+    loop_watchdog.start()
+
 function_callbacks = {"generate_image": generate_image} | alarms.function_callbacks | gcal.function_callbacks
 
 def main() -> None:
     chatgpt.init(chatbot_functions, function_callbacks)
     with open('telegram.token', 'r') as file:
         token = file.read().strip()
-    application = Application.builder().token(token).build()
+    application = Application.builder().token(token).post_init(post_init).build()
     application.job_queue.scheduler.add_jobstore(
             PTBSQLAlchemyJobStore(application, url='sqlite:///jobs.sqlite'))
     application.add_handler(TypeHandler(Update, validate_user), -1)
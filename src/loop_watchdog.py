@@ -0,0 +1,121 @@
+from collections import Counter
+from telegram import Update
+from telegram.ext import ContextTypes
+import asyncio
+import config
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STALL_THRESHOLD = 0.5
+SAMPLE_INTERVAL = 0.01
+TOP_STACKS = 10
+# Every callback and task step the loop runs is dispatched through this frame
+DISPATCH_CODE = asyncio.events.Handle._run.__code__
+
+def parse_threshold(value):
+    try:
+        threshold = float(value or DEFAULT_STALL_THRESHOLD)
+    except ValueError:
+        threshold = 0
+    if not math.isfinite(threshold) or threshold <= 0:
+        logger.warning("Invalid MAIA_STALL_THRESHOLD %r, using %ss", value, DEFAULT_STALL_THRESHOLD)
+        return DEFAULT_STALL_THRESHOLD
+    return threshold
+
+STALL_THRESHOLD = parse_threshold(config.get("MAIA_STALL_THRESHOLD"))
+
+state = {"heartbeat": 0.0, "thread_id": None, "profiling": False, "samples": Counter()}
+
+def start():
+    # Must be called from inside the running loop, e.g. from Application.post_init
+    loop = asyncio.get_running_loop()
+    state["thread_id"] = threading.get_ident()
+    state["heartbeat"] = time.monotonic()
+    threading.Thread(target=watch, args=(loop,), name="watchdog", daemon=True).start()
+
+def beat():
+    state["heartbeat"] = time.monotonic()
+
+def loop_frame():
+    return sys._current_frames().get(state["thread_id"])
+
+def handler_frames(frame):
+    # Bot frames below the loop's dispatch frame, outermost first, without
+    # reading source lines. Empty when the loop is idle or in its own code.
+    frames = []
+    while frame is not None and frame.f_code is not DISPATCH_CODE:
+        filename = frame.f_code.co_filename
+        if filename.startswith(SRC_DIR) and filename != __file__:
+            frames.append((os.path.basename(filename), frame.f_code.co_name, frame.f_lineno))
+        frame = frame.f_back
+    if frame is None:
+        return []
+    return frames[::-1]
+
+def report_stall(stalled_for):
+    frame = loop_frame()
+    if frame is None:
+        return
+    frames = handler_frames(frame)
+    handler = frames[0][1] if frames else "<unknown>"
+    logger.warning("Event loop stalled for %.2fs in %s:\n%s",
+                   stalled_for, handler, "".join(traceback.format_stack(frame)))
+
+def sample():
+    frame = loop_frame()
+    frames = handler_frames(frame) if frame is not None else []
+    key = ";".join(f"{filename}:{name}:{lineno}" for filename, name, lineno in frames) or "<idle or library>"
+    state["samples"][key] += 1
+
+def watch(loop):
+    pinged_at = None
+    reported = False
+    while True:
+        now = time.monotonic()
+        if state["profiling"]:
+            sample()
+        if pinged_at is None or state["heartbeat"] >= pinged_at:
+            if reported:
+                logger.warning("Event loop recovered after %.2fs", state["heartbeat"] - pinged_at)
+            pinged_at = now
+            reported = False
+            try:
+                loop.call_soon_threadsafe(beat)
+            except RuntimeError:
+                return # loop is closed
+        elif not reported and now - pinged_at > STALL_THRESHOLD:
+            report_stall(now - pinged_at)
+            reported = True
+        time.sleep(SAMPLE_INTERVAL if state["profiling"] else STALL_THRESHOLD / 4)
+
+def profile_report():
+    samples = state["samples"].copy() # the watchdog thread may be adding samples
+    total = sum(samples.values())
+    if total == 0:
+        return "No samples collected."
+    lines = [f"{total} samples, top {TOP_STACKS} stacks:"]
+    for stack, count in samples.most_common(TOP_STACKS):
+        lines.append(f"{100 * count / total:5.1f}% {stack}")
+    return "\n".join(lines)[:4000] # stay under the telegram message length limit
+
+async def handle_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    subcommand = context.args[1] if len(context.args) > 1 else "show"
+    if subcommand == "on":
+        state["samples"] = Counter()
+        state["profiling"] = True
+        await update.message.reply_text("Profiler started.")
+    elif subcommand == "off":
+        state["profiling"] = False
+        await update.message.reply_text("Profiler stopped.\n" + profile_report())
+    elif subcommand == "show":
+        await update.message.reply_text(profile_report())
+    else:
+        await update.message.reply_text("Usage: /dev profile [on|off|show]")